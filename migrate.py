@@ -0,0 +1,69 @@
+"""
+One-off schema upgrade for databases created by earlier versions of the Recipe API.
+
+Run it once, with the API stopped or before rolling out the new version:
+
+    python migrate.py
+
+Fresh databases don't need it; the API creates the current schema on startup.
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from main import Recipe, engine
+
+# Indexes earlier versions created that no filter can use (the primary key already covers id)
+_OBSOLETE_INDEXES = ("ix_recipes_id", "ix_recipes_title")
+
+# Timestamp columns still stored as naive UTC values from the old Python-side defaults
+_NAIVE_TIMESTAMPS_SQL = text(
+    "SELECT column_name FROM information_schema.columns "
+    "WHERE table_schema = current_schema() AND table_name = 'recipes' "
+    "AND column_name IN ('created_at', 'updated_at') "
+    "AND data_type = 'timestamp without time zone'"
+)
+
+async def migrate_timestamps(conn):
+    """Convert created_at/updated_at to timestamptz with now() defaults and no NULLs"""
+    naive_columns = (await conn.execute(_NAIVE_TIMESTAMPS_SQL)).scalars().all()
+    for column in naive_columns:
+        await conn.execute(text(
+            f"ALTER TABLE recipes ALTER COLUMN {column} TYPE timestamptz USING {column} AT TIME ZONE 'UTC'"
+        ))
+    await conn.execute(text("UPDATE recipes SET created_at = now() WHERE created_at IS NULL"))
+    await conn.execute(text("UPDATE recipes SET updated_at = created_at WHERE updated_at IS NULL"))
+    for column in ("created_at", "updated_at"):
+        await conn.execute(text(
+            f"ALTER TABLE recipes ALTER COLUMN {column} SET DEFAULT now(), ALTER COLUMN {column} SET NOT NULL"
+        ))
+
+def _concurrent_index_ddl(index) -> str:
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS for one of the model's indexes"""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+    return ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+
+async def migrate_indexes(conn):
+    """Build the model's indexes without blocking writes and drop the obsolete ones
+    
+    CONCURRENTLY can't run inside a transaction, so conn must be in autocommit mode.
+    If a build fails it leaves an INVALID index behind; drop it and run this again.
+    """
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for index in Recipe.__table__.indexes:
+        await conn.execute(text(_concurrent_index_ddl(index)))
+    for name in _OBSOLETE_INDEXES:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+async def run_migrations():
+    async with engine.begin() as conn:
+        await migrate_timestamps(conn)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await migrate_indexes(conn)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(run_migrations())